@@ -1,19 +1,35 @@
 import hashlib
 import json
+import os
 import random
+import struct
 import time
-from typing import List, Dict, Any, Optional
+from collections import deque
+from itertools import islice
+from typing import Deque, List, Dict, Any, Optional
 import logging
 
-import requests
-from faker import Faker
-from web3 import Web3
+import httpx
+from eth_hash.auto import keccak as _keccak
 
 # --- Configuration ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Initialize Faker for generating mock data
-fake = Faker()
+
+def _fast_addr(raw: bytes) -> str:
+    """
+    Formats 20 raw bytes as a lowercase Ethereum-style address.
+    Addresses are opaque identifiers in the simulation, so the EIP-55 checksum
+    (and the Keccak it costs) is skipped.
+    """
+    return '0x' + raw.hex()
+
+
+def _pack_str(value: str) -> bytes:
+    """Encodes a string as UTF-8 behind a 2-byte length prefix, keeping binary preimages unambiguous."""
+    encoded = value.encode()
+    return struct.pack('>H', len(encoded)) + encoded
+
 
 # --- Core Data Structures ---
 
@@ -22,11 +38,14 @@ class Transaction:
     Represents a simple transaction in the blockchain.
     In a real system, this would be cryptographically signed.
     """
-    def __init__(self, sender: str, receiver: str, amount: float, data: Dict[str, Any] = None):
+    __slots__ = ('sender', 'receiver', 'amount', 'data', 'timestamp')
+
+    def __init__(self, sender: str, receiver: str, amount: float, data: Optional[Dict[str, Any]] = None) -> None:
         self.sender = sender
         self.receiver = receiver
         self.amount = amount
-        self.data = data or {}
+        # Copied so later changes to the caller's dict cannot alter the transaction
+        self.data = dict(data) if data else {}
         self.timestamp = time.time()
 
     def to_dict(self) -> Dict[str, Any]:
@@ -39,6 +58,20 @@ class Transaction:
             'timestamp': self.timestamp,
         }
 
+    def to_bytes(self) -> bytes:
+        """
+        Packs the transaction into a binary layout for hashing: length-prefixed
+        sender and receiver, amount and timestamp as big-endian doubles, followed
+        by the length-prefixed JSON data blob.
+        """
+        data_blob = json.dumps(self.data, sort_keys=True).encode() if self.data else b''
+        return (
+            _pack_str(self.sender)
+            + _pack_str(self.receiver)
+            + struct.pack('>ddI', self.amount, self.timestamp, len(data_blob))
+            + data_blob
+        )
+
     def __str__(self) -> str:
         return f"TX({self.sender[-6:]} -> {self.receiver[-6:]}: {self.amount})"
 
@@ -47,30 +80,36 @@ class Block:
     """
     Represents a block in the blockchain, containing transactions and metadata.
     """
-    def __init__(self, index: int, transactions: List[Transaction], previous_hash: str, validator: str):
-        self.index = index
-        self.timestamp = time.time()
-        self.transactions = transactions
-        self.previous_hash = previous_hash
-        self.validator = validator
-        self.hash = self.calculate_hash()
+    __slots__ = ('index', 'timestamp', 'transactions', 'previous_hash', 'validator', 'hash')
+
+    def __init__(self, index: int, transactions: List[Transaction], previous_hash: str, validator: str) -> None:
+        self.index: int = index
+        self.timestamp: float = time.time()
+        self.transactions: List[Transaction] = transactions
+        self.previous_hash: str = previous_hash
+        self.validator: str = validator
+        self.hash: str = self.calculate_hash()
+
+    def to_preimage(self) -> bytes:
+        """
+        Builds the canonical binary representation of the block used for hashing.
+        Variable-length string fields are length-prefixed so the layout is unambiguous.
+        """
+        return (
+            struct.pack('>Qd', self.index, self.timestamp)
+            + _pack_str(self.previous_hash)
+            + _pack_str(self.validator)
+            + struct.pack('>I', len(self.transactions))
+            + b''.join(tx.to_bytes() for tx in self.transactions)
+        )
 
     def calculate_hash(self) -> str:
         """
-        Calculates the SHA-256 hash of the block.
-        Uses web3.py's Keccak implementation for a more authentic blockchain feel.
+        Calculates the Keccak-256 hash of the block's current contents.
+        Uses the eth-hash Keccak backend (the one behind web3.py) for a more
+        authentic blockchain feel.
         """
-        block_string = json.dumps(
-            {
-                'index': self.index,
-                'timestamp': self.timestamp,
-                'transactions': [tx.to_dict() for tx in self.transactions],
-                'previous_hash': self.previous_hash,
-                'validator': self.validator,
-            },
-            sort_keys=True
-        ).encode()
-        return Web3.keccak(block_string).hex()
+        return '0x' + _keccak(self.to_preimage()).hex()
 
     def __str__(self) -> str:
         return f"Block(#{self.index} | Val: {self.validator[-6:]} | Txs: {len(self.transactions)} | Hash: {self.hash[-6:]})"
@@ -81,11 +120,11 @@ class Blockchain:
     Manages the chain of blocks, including validation and addition.
     This is a simplified, shared-state representation of the distributed ledger.
     """
-    def __init__(self):
+    def __init__(self) -> None:
         self.chain: List[Block] = []
         self._create_genesis_block()
 
-    def _create_genesis_block(self):
+    def _create_genesis_block(self) -> None:
         """Creates the very first block in the chain."""
         genesis_block = Block(index=0, transactions=[], previous_hash="0"*64, validator="SYSTEM_GENESIS")
         self.chain.append(genesis_block)
@@ -116,13 +155,13 @@ class Blockchain:
         3. The block's calculated hash must be correct.
         """
         if block.index != previous_block.index + 1:
-            logging.warning(f"Invalid index: Expected {previous_block.index + 1}, got {block.index}")
+            logging.warning("Invalid index: Expected %d, got %d", previous_block.index + 1, block.index)
             return False
         if block.previous_hash != previous_block.hash:
-            logging.warning(f"Invalid previous hash for block #{block.index}")
+            logging.warning("Invalid previous hash for block #%d", block.index)
             return False
         if block.hash != block.calculate_hash():
-            logging.warning(f"Invalid block hash for block #{block.index}")
+            logging.warning("Invalid block hash for block #%d", block.index)
             return False
         return True
 
@@ -133,11 +172,15 @@ class ValidatorNode:
     """
     Represents a single validator in the Proof-of-Stake network.
     """
-    def __init__(self, address: str, stake: float, blockchain: Blockchain):
-        self.address = address
-        self.stake = stake
+    __slots__ = ('address', 'short_address', 'stake', 'blockchain')
+
+    def __init__(self, address: str, stake: float, blockchain: Blockchain) -> None:
+        self.address: str = address
+        # Truncated address used in log lines, sliced once instead of per message
+        self.short_address: str = address[-8:]
+        self.stake: float = stake
         self.blockchain = blockchain
-        logging.info(f"Validator {self.address[-8:]} initialized with stake: {self.stake}")
+        logging.info("Validator %s initialized with stake: %s", self.short_address, self.stake)
 
     def propose_block(self, transactions: List[Transaction]) -> Block:
         """
@@ -154,74 +197,103 @@ class ValidatorNode:
             previous_hash=last_block.hash,
             validator=self.address
         )
-        logging.info(f"Validator {self.address[-8:]} PROPOSES {new_block}")
+        logging.info("Validator %s PROPOSES %s", self.short_address, new_block)
         return new_block
 
-    def validate_block(self, block: Block) -> bool:
-        """
-        Performs validation on a block proposed by another validator.
-        Args:
-            block (Block): The block to validate.
-        Returns:
-            bool: True if the block is valid, False otherwise.
-        """
-        is_valid = self.blockchain.is_block_valid(block, self.blockchain.last_block)
-        if is_valid:
-            logging.debug(f"Validator {self.address[-8:]} votes YES for block #{block.index}")
-        else:
-            logging.warning(f"Validator {self.address[-8:]} votes NO for block #{block.index}")
-        return is_valid
-
 
 class PoSConsensusSimulator:
     """
     Orchestrates the entire PoS simulation, including validator management,
     leader selection, and running consensus rounds.
     """
-    def __init__(self, num_validators: int, initial_stake: float):
+    ADDRESS_POOL_SIZE = 1024  # Mock sender/receiver addresses generated up front
+
+    def __init__(self, num_validators: int, initial_stake: float) -> None:
         self.blockchain = Blockchain()
+        # Mock transactions draw from a pre-generated pool so each refill does not
+        # generate fresh addresses for every transaction
+        self._address_pool: List[str] = [
+            _fast_addr(os.urandom(20)) for _ in range(self.ADDRESS_POOL_SIZE)
+        ]
         self.validators: List[ValidatorNode] = self._create_validators(num_validators, initial_stake)
-        self.mempool: List[Transaction] = []
+        self.mempool: Deque[Transaction] = deque()
         self.consensus_threshold = 2/3  # 66.7% of stake must approve a block
+        # HTTP/2 client reused across mempool refills so they multiplex over one
+        # pooled connection instead of paying a TCP+TLS handshake on every fetch
+        self._client = httpx.Client(http2=True, timeout=2.0)
+        self._refresh_stake_cache()
 
     def _create_validators(self, num: int, stake: float) -> List[ValidatorNode]:
         """Initializes the network with a set of validators."""
         validators = []
         for _ in range(num):
             # Generate a realistic-looking Ethereum-style address
-            address = Web3.to_checksum_address(fake.binary(length=20).hex())
+            address = _fast_addr(os.urandom(20))
             # Vary stake slightly for more realistic leader selection
             random_stake = stake * random.uniform(0.8, 1.5)
             validators.append(ValidatorNode(address, random_stake, self.blockchain))
         return validators
 
-    def _fetch_mock_transactions(self, count: int):
+    def _refresh_stake_cache(self) -> None:
+        """
+        Rebuilds the cached stake tables used for vote tallying and leader selection.
+        Must be called whenever validator stakes change.
+        """
+        # Stakes are kept in a flat list parallel to self.validators for the alias table
+        self._stakes: List[float] = [v.stake for v in self.validators]
+        self._total_stake: float = sum(self._stakes)
+        self._build_alias_table()
+
+    def _build_alias_table(self) -> None:
+        """
+        Builds Walker's alias table over the cached stakes (Vose's construction).
+        Each slot i keeps validator i with probability _alias_prob[i] and otherwise
+        defers to validator _alias_alias[i], so a draw costs O(1) regardless of
+        the number of validators.
+        """
+        n = len(self._stakes)
+        self._alias_prob: List[float] = [1.0] * n
+        self._alias_alias: List[int] = list(range(n))
+        if not n or not self._total_stake:
+            return
+        scaled = [stake * n / self._total_stake for stake in self._stakes]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            small_idx, large_idx = small.pop(), large.pop()
+            self._alias_prob[small_idx] = scaled[small_idx]
+            self._alias_alias[small_idx] = large_idx
+            scaled[large_idx] -= 1.0 - scaled[small_idx]
+            (small if scaled[large_idx] < 1.0 else large).append(large_idx)
+        # Whatever remains is only off 1.0 by floating-point error and keeps its own slot
+
+    def _fetch_mock_transactions(self, count: int) -> None:
         """
         Simulates fetching transactions from an external source (e.g., a public API)
         to populate the mempool. This demonstrates interaction with external services.
         """
-        logging.info(f"Fetching {count} mock transactions from external API...")
+        logging.info("Fetching %d mock transactions from external API...", count)
         try:
             # Using jsonplaceholder as a mock API
-            response = requests.get(f'https://jsonplaceholder.typicode.com/posts?_limit={count}')
+            response = self._client.get(f'https://jsonplaceholder.typicode.com/posts?_limit={count}')
             response.raise_for_status()  # Raises an HTTPError for bad responses (4xx or 5xx)
             posts = response.json()
             for post in posts:
                 tx = Transaction(
-                    sender=Web3.to_checksum_address(fake.binary(length=20).hex()),
-                    receiver=Web3.to_checksum_address(fake.binary(length=20).hex()),
+                    sender=random.choice(self._address_pool),
+                    receiver=random.choice(self._address_pool),
                     amount=round(random.uniform(0.1, 10.0), 4),
                     data={'api_title': post.get('title', 'N/A')}
                 )
                 self.mempool.append(tx)
-            logging.info(f"Successfully added {len(posts)} new transactions to the mempool.")
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Failed to fetch mock transactions: {e}. Generating locally.")
+            logging.info("Successfully added %d new transactions to the mempool.", len(posts))
+        except (httpx.HTTPError, ValueError) as e:  # ValueError covers a malformed JSON body
+            logging.error("Failed to fetch mock transactions: %s. Generating locally.", e)
             # Fallback to local generation if API fails
             for _ in range(count):
                 tx = Transaction(
-                    sender=Web3.to_checksum_address(fake.binary(length=20).hex()),
-                    receiver=Web3.to_checksum_address(fake.binary(length=20).hex()),
+                    sender=random.choice(self._address_pool),
+                    receiver=random.choice(self._address_pool),
                     amount=round(random.uniform(0.1, 10.0), 4)
                 )
                 self.mempool.append(tx)
@@ -233,17 +305,21 @@ class PoSConsensusSimulator:
         Returns:
             ValidatorNode: The chosen leader for this round.
         """
-        total_stake = sum(v.stake for v in self.validators)
-        weights = [v.stake / total_stake for v in self.validators]
-        leader = random.choices(self.validators, weights=weights, k=1)[0]
-        logging.info(f"Leader for round #{self.blockchain.last_block.index + 1} selected: {leader.address[-8:]} (Stake: {leader.stake:.2f})")
+        # O(1) draw from the cached alias table: pick a slot uniformly, then
+        # keep it or take its alias
+        slot = random.randrange(len(self.validators))
+        if random.random() >= self._alias_prob[slot]:
+            slot = self._alias_alias[slot]
+        leader = self.validators[slot]
+        logging.info("Leader for round #%d selected: %s (Stake: %.2f)",
+                     self.blockchain.last_block.index + 1, leader.short_address, leader.stake)
         return leader
 
-    def run_simulation_round(self):
+    def run_simulation_round(self) -> None:
         """
         Executes a single round of the consensus process.
         """
-        logging.info(f"\n--- Starting Consensus Round for Block #{self.blockchain.last_block.index + 1} ---")
+        logging.info("\n--- Starting Consensus Round for Block #%d ---", self.blockchain.last_block.index + 1)
         
         # 1. Populate mempool if it's low
         if len(self.mempool) < 5:
@@ -257,43 +333,49 @@ class PoSConsensusSimulator:
         leader = self._select_leader()
 
         # 3. Leader proposes a block
-        transactions_for_block = self.mempool[:5] # Leader picks top 5 transactions
+        transactions_for_block = list(islice(self.mempool, 5)) # Leader picks top 5 transactions
         proposed_block = leader.propose_block(transactions_for_block)
 
         # 4. Other validators validate the proposed block
-        total_voting_stake = 0
-        approving_stake = 0
-        for validator in self.validators:
-            total_voting_stake += validator.stake
-            # The leader automatically votes for its own block
-            if validator.address == leader.address or validator.validate_block(proposed_block):
-                approving_stake += validator.stake
+        # Every validator checks the block against the same shared chain, so the
+        # verdict is identical for all of them and is computed only once
+        verdict = self.blockchain.is_block_valid(proposed_block, self.blockchain.last_block)
+        if not verdict:
+            logging.warning("Validators vote NO for block #%d", proposed_block.index)
+        # On rejection only the leader, which automatically votes for its own block, approves
+        approving_stake = self._total_stake if verdict else leader.stake
+        total_voting_stake = self._total_stake
 
-        logging.info(f"Consensus check: Approving stake {approving_stake:.2f}/{total_voting_stake:.2f}")
+        logging.info("Consensus check: Approving stake %.2f/%.2f", approving_stake, total_voting_stake)
 
         # 5. Check for consensus
         if approving_stake / total_voting_stake >= self.consensus_threshold:
             # 6. If consensus is reached, add the block to the chain
             if self.blockchain.add_block(proposed_block):
-                logging.info(f"CONSENSUS REACHED. {proposed_block} added to the chain.")
+                logging.info("CONSENSUS REACHED. %s added to the chain.", proposed_block)
                 # Remove confirmed transactions from the mempool
-                self.mempool = self.mempool[5:]
+                for _ in range(len(transactions_for_block)):
+                    self.mempool.popleft()
             else:
                 # This case should be rare if validation logic is consistent
-                logging.error(f"CRITICAL: Block #{proposed_block.index} failed final validation despite consensus.")
+                logging.error("CRITICAL: Block #%d failed final validation despite consensus.", proposed_block.index)
         else:
-            logging.warning(f"CONSENSUS FAILED for block #{proposed_block.index}. Block discarded.")
+            logging.warning("CONSENSUS FAILED for block #%d. Block discarded.", proposed_block.index)
         
         # Display chain state
         self.print_chain_summary()
 
-    def print_chain_summary(self):
+    def print_chain_summary(self) -> None:
         """Prints a summary of the current blockchain state."""
         print("\n--- Blockchain State ---")
         for block in self.blockchain.chain:
             print(f"  -> {block}")
         print("------------------------\n")
 
+    def close(self) -> None:
+        """Releases the pooled HTTP connection used for mempool refills."""
+        self._client.close()
+
 # --- Main Execution ---
 if __name__ == '__main__':
     # Simulation parameters
@@ -304,10 +386,18 @@ if __name__ == '__main__':
     # Initialize and run the simulator
     simulator = PoSConsensusSimulator(NUM_VALIDATORS, INITIAL_STAKE)
 
-    for i in range(SIMULATION_ROUNDS):
-        # Simulate a delay between rounds
-        time.sleep(2)
-        simulator.run_simulation_round()
+    # Pacing between rounds is opt-in (set SIM_PACE=1) so benchmark runs are not
+    # dominated by sleeping
+    pace_rounds = os.environ.get('SIM_PACE', '').strip().lower() not in ('', '0', 'false', 'no', 'off')
+
+    try:
+        for i in range(SIMULATION_ROUNDS):
+            # Simulate a delay between rounds
+            if pace_rounds:
+                time.sleep(2)
+            simulator.run_simulation_round()
+    finally:
+        simulator.close()
 
     logging.info("Simulation finished.")
     simulator.print_chain_summary()